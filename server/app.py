@@ -1,47 +1,156 @@
 #!/usr/bin/env python3
 
-from flask import Flask, session, make_response, jsonify, request
-from flask_bcrypt import Bcrypt
+from flask import Flask, Response, session, request
+from flask.json.provider import DefaultJSONProvider
 from dotenv import load_dotenv
 import os
+import hashlib
+import threading
+from concurrent import futures
 from flask_migrate import Migrate
-from models import db, Article, User
+from models import db, bcrypt, Article, User, TagType, check_password
+from schemas import ArticleIn
+from pydantic import ValidationError
 from flask_restful import Api, Resource
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy import text
 import cloudinary
 import cloudinary.uploader
-from flask_cors import CORS
+from flask_session import Session
+import redis
+import orjson
+from cachetools import TTLCache
 
 load_dotenv()
 
+class OrjsonProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_INDENT_2 if self._app.debug else 0
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 app.config['SECRET_KEY'] = os.environ['SECRET_KEY']
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ['SQLALCHEMY_DATABASE_URI']
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.json.compact = False
 app.config['SESSION_COOKIE_SAMESITE'] = 'None'
 app.config['SESSION_COOKIE_SECURE'] = True
 app.config['REMEMBER_COOKIE_SECURE'] = True
 app.config['CLOUDINARY_CLOUD_NAME'] = os.environ['CLOUDINARY_CLOUD_NAME']
 app.config['CLOUDINARY_API_KEY'] = os.environ['CLOUDINARY_API_KEY']
 app.config['CLOUDINARY_API_SECRET'] = os.environ['CLOUDINARY_API_SECRET']
+app.config['BCRYPT_LOG_ROUNDS'] = int(os.environ.get('BCRYPT_LOG_ROUNDS', '10'))
+app.config['SESSION_TYPE'] = 'redis'
+app.config['SESSION_PERMANENT'] = False
+app.config['SESSION_REDIS'] = redis.Redis.from_url(os.environ['REDIS_URL'])
+
+ALLOWED_ORIGIN = "https://blog-project-frontend-omega.vercel.app"
+
+PAGE_VIEW_LIMIT = 100
+PAGE_VIEW_WINDOW = 86400
+
+ARTICLES_PER_PAGE = 20
+MAX_ARTICLE_PAGE = 10000
+
+# Tags are stored as SMALLINT codes; map them back to names in SQL.
+TAG_CASE_SQL = 'CASE a.tag {} END'.format(
+    ' '.join(f"WHEN {code} THEN '{tag}'" for code, tag in TagType.TAGS.items())
+)
 
-bcrypt = Bcrypt(app=app)
+# Postgres builds the list payload itself (same shape as Article._serialize
+# minus content), so the rows are never hydrated into ORM objects. Keep it in
+# step with Article._serialize, User._serialize and models.DATETIME_FORMAT.
+INDEX_ARTICLES_SQL = text(f"""
+    SELECT COALESCE(json_agg(json_build_object(
+        'id', a.id,
+        'author', a.author,
+        'title', a.title,
+        'preview_text', a.preview_text,
+        'preview_image', a.preview_image,
+        'minutes_to_read', a.minutes_to_read,
+        'tag', {TAG_CASE_SQL},
+        'date', to_char(a.date, 'YYYY-MM-DD HH24:MI:SS'),
+        'user_id', a.user_id,
+        'user', CASE WHEN u.id IS NULL THEN NULL ELSE json_build_object(
+            'id', u.id,
+            'username', u.username,
+            'avatar', u.avatar
+        ) END
+    ) ORDER BY a.id DESC), '[]')::text
+    FROM (
+        SELECT id, author, title, preview_text, preview_image,
+               minutes_to_read, tag, date, user_id
+        FROM articles ORDER BY id DESC LIMIT :limit OFFSET :offset
+    ) AS a
+    LEFT JOIN users AS u ON u.id = a.user_id
+""")
+
+# Cheap version stamp for the index; any new article changes it.
+INDEX_VERSION_SQL = text("SELECT COUNT(*), MAX(id), MAX(date) FROM articles")
+
+index_cache = TTLCache(maxsize=32, ttl=60)
+index_cache_lock = threading.Lock()
+
+bcrypt.init_app(app)
+
+# Checked against when the username is unknown so that failed logins take
+# the same time whether or not the user exists.
+DUMMY_HASH = bcrypt.generate_password_hash('x' * 8).decode('utf-8')
 
 migrate = Migrate(app=app, db=db)
 
+Session(app)
+
+# Atomic INCR + EXPIRE so each session's window starts on its first view.
+count_page_view = app.config['SESSION_REDIS'].register_script(
+    "local n = redis.call('INCR', KEYS[1]) "
+    "if n == 1 then redis.call('EXPIRE', KEYS[1], ARGV[1]) end "
+    "return n"
+)
+
 db.init_app(app)
 
 api = Api(app)
 
-CORS(app, origins=["https://blog-project-frontend-omega.vercel.app"], supports_credentials=True)
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    response = app.json.response(data)
+    response.status_code = code
+    response.headers.extend(headers or {})
+    return response
+
+@app.before_request
+def handle_preflight():
+    if request.method == 'OPTIONS' and request.headers.get('Origin') == ALLOWED_ORIGIN:
+        return '', 204
+
+@app.after_request
+def add_cors_headers(response):
+    response.vary.add('Origin')
+    if request.headers.get('Origin') != ALLOWED_ORIGIN:
+        return response
+
+    response.headers['Access-Control-Allow-Origin'] = ALLOWED_ORIGIN
+    response.headers['Access-Control-Allow-Credentials'] = 'true'
+    response.headers['Access-Control-Expose-Headers'] = 'Link, X-Total-Count'
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, PATCH, DELETE, OPTIONS'
+        requested_headers = request.headers.get('Access-Control-Request-Headers')
+        if requested_headers:
+            response.headers['Access-Control-Allow-Headers'] = requested_headers
+    return response
 
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
+    storage_uri=os.environ['RATELIMIT_REDIS_URL'],
+    strategy='fixed-window',
     default_limits=['200 per day', '75 per hour'] #Remember to edit this
 )
 
@@ -53,6 +162,7 @@ cloudinary.config(
 
 class ClearSession(Resource):
     def delete(self):
+        app.config['SESSION_REDIS'].delete(f'views:{session.sid}')
         session['page_views'] = None
         session['user_id'] = None
 
@@ -60,20 +170,48 @@ class ClearSession(Resource):
     
 class IndexArticle(Resource):
     def get(self):
-        articles = [article.to_dict() for article in Article.query.all()]
-        return articles, 200
+        page = max(request.args.get('page', 1, type=int), 1)
+        if page > MAX_ARTICLE_PAGE:
+            return {'Error': f'page must be at most {MAX_ARTICLE_PAGE}'}, 400
+
+        total, *version = db.session.execute(INDEX_VERSION_SQL).one()
+        key = (page, total, *version)
+
+        with index_cache_lock:
+            cached = index_cache.get(key)
+
+        if cached is None:
+            payload = db.session.execute(
+                INDEX_ARTICLES_SQL,
+                {'limit': ARTICLES_PER_PAGE, 'offset': (page - 1) * ARTICLES_PER_PAGE}
+            ).scalar().encode('utf-8')
+            cached = (payload, hashlib.sha1(payload).hexdigest())
+            with index_cache_lock:
+                index_cache[key] = cached
+
+        payload, etag = cached
+        response = Response(payload, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['X-Total-Count'] = str(total)
+        if page * ARTICLES_PER_PAGE < total and page < MAX_ARTICLE_PAGE:
+            response.headers['Link'] = f'<{request.base_url}?page={page + 1}>; rel="next"'
+        return response.make_conditional(request)
     
 class ShowArticle(Resource):
     def get(self, id):
-        session['page_views'] = 0 if not session.get('page_views') else session.get('page_views')
-        session['page_views'] += 1
+        article = db.session.get(Article, id)
+        if not article:
+            return {"Error": "Article not found"}, 404
+
+        page_views = count_page_view(keys=[f'views:{session.sid}'], args=[PAGE_VIEW_WINDOW])
+        # Also keeps the session non-empty so Flask-Session persists it and
+        # the client keeps the same sid (and counter) on its next request.
+        session['page_views'] = page_views
 
-        if session['page_views'] <= 100: #change this
-            article = Article.query.filter(Article.id == id).first()
-            article_json = jsonify(article.to_dict())
+        if page_views > PAGE_VIEW_LIMIT:
+            return {"message": "Maximum pageview limit reached"}, 401
 
-            return make_response(article_json, 200)
-        return {"message": "Maximum pageview limit reached"}, 401
+        return article._serialize(), 200
     
 class GetArticle(Resource):
     def get(self):
@@ -81,9 +219,9 @@ class GetArticle(Resource):
         if not user_id:
             return {"Error": "Unauthorized"}, 401
         
-        articles = Article.query.filter_by(user_id=user_id).all()
+        articles = Article.query_with_user().filter_by(user_id=user_id).all()
 
-        return [article.to_dict() for article in articles], 200
+        return [article._serialize() for article in articles], 200
 
 class CreateArticle(Resource):
     decorators = [limiter.limit("100 per hour")]
@@ -97,35 +235,26 @@ class CreateArticle(Resource):
         if not user:
             return {'Error': 'User not found'}, 404
         
-        data = request.get_json()
-        required_fields = ['title', 'content', 'preview_text', 'minutes_to_read']
-        
-        if not all(field in data for field in required_fields):
-            return {'Error': f'Missing required fields: {required_fields}'}, 400
-
-        allowed_tags = ['Product', 'Engineering', 'Design']
-        if 'tag' in data and data['tag'] not in allowed_tags:
-            return {'error': f'Invalid tag. Allowed values: {allowed_tags}'}, 400
+        try:
+            data = ArticleIn.model_validate(request.get_json(silent=True))
+        except ValidationError as e:
+            return {'Error': e.errors(include_url=False, include_input=False)}, 400
 
         try:
-            article_data = {
-                'author': user.username,
-                'title': data['title'],
-                'content': data['content'],
-                'preview_text': data['preview_text'],
-                'minutes_to_read': data['minutes_to_read'],
-                'user_id': user_id,
-                'tag': data.get('tag'), 
-                'preview_image': data.get('preview_image')
-            }
-
-            article_data = {k: v for k, v in article_data.items() if v is not None}
-
-            article = Article(**article_data)
+            article = Article(
+                author=user.username,
+                user_id=user_id,
+                **data.model_dump(exclude_none=True)
+            )
             db.session.add(article)
+            # Don't wait for the WAL flush on this transaction. A crash within
+            # a few hundred ms of the response can lose the article, but it
+            # can never leave the database inconsistent.
+            if db.engine.dialect.name == 'postgresql':
+                db.session.execute(text('SET LOCAL synchronous_commit TO OFF'))
             db.session.commit()
             
-            return article.to_dict(), 201
+            return article._serialize(), 201
 
         except (IntegrityError, ValueError) as e:
             db.session.rollback()
@@ -135,25 +264,40 @@ class Login(Resource):
     decorators = [limiter.limit("5 per minute")] 
 
     def post(self):
-        username = request.get_json()['username']
-        password = request.get_json()['password']
+        data = request.get_json(silent=True) or {}
+        username = data.get('username')
+        password = data.get('password')
 
         if not username or not password:
             return {'error': 'Username and password are required'}, 400
         
         user = User.query.filter_by(username=username).first()
 
-        if user and user.authenticate(password):
+        try:
+            if user is None:
+                check_password(DUMMY_HASH, password)
+                return {"Error": "Invalid credentials"}, 401
+
+            authenticated = user.authenticate(password)
+        except futures.TimeoutError:
+            return {"Error": "Login is temporarily unavailable"}, 503
+
+        if authenticated:
+            if user.needs_rehash():
+                user.password_hash = password
+                db.session.commit()
+
             session['user_id'] = user.id
-            return user.to_dict(), 200
+            return user._serialize(include_articles=True), 200
         return {"Error": "Invalid credentials"}, 401
     
 class SignUp(Resource):
     decorators = [limiter.limit("3 per hour")] 
 
     def post(self):
-        username = request.get_json()['username']
-        password = request.get_json()['password']
+        data = request.get_json(silent=True) or {}
+        username = data.get('username')
+        password = data.get('password')
 
         if not username or not password:
             return {"Error": "Username and password are required"}, 400
@@ -168,7 +312,7 @@ class SignUp(Resource):
             db.session.commit()
 
             session['user_id'] = user.id
-            return user.to_dict(), 201
+            return user._serialize(include_articles=True), 201
         
         except ValueError as e:
             return {"error": str(e)}, 400
@@ -180,10 +324,11 @@ class Logout(Resource):
     
 class CheckSession(Resource):
     def get(self):
-        user = User.query.filter(User.id == session.get('user_id')).first()
+        user_id = session.get('user_id')
+        user = db.session.get(User, user_id) if user_id else None
 
         if user:
-            return (user.to_dict()), 200
+            return (user._serialize(include_articles=True)), 200
         return {}, 401
     
 # Update avatar method for later
@@ -202,8 +347,11 @@ class UploadImage(Resource):
             return {'error': 'No selected file'}, 400
 
         try:
-            upload_result = cloudinary.uploader.upload(
-                file,
+            upload_result = cloudinary.uploader.upload_large(
+                file.stream,
+                chunk_size=6 * 1024 * 1024,
+                resource_type="image",
+                use_filename=False,
                 folder="article_images",
                 allowed_formats=["jpg", "png", "jpeg", "gif"],
                 transformation=[{"width": 1200, "height": 630, "crop": "limit"}]
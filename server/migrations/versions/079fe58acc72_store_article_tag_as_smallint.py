@@ -0,0 +1,52 @@
+"""store article tag as smallint
+
+Revision ID: 079fe58acc72
+Revises:
+Create Date: 2026-10-15 12:00:00.000000
+
+Converts the already-deployed schema; it does not create the tables. For a
+fresh database use db.create_all() followed by `flask db stamp head` (see
+README).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '079fe58acc72'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+TAGS = {1: 'Product', 2: 'Engineering', 3: 'Design'}
+
+
+def upgrade():
+    op.alter_column(
+        'articles',
+        'tag',
+        existing_type=postgresql.ENUM(*TAGS.values(), name='tag_enum'),
+        type_=sa.SmallInteger(),
+        existing_nullable=False,
+        postgresql_using='CASE tag {} END'.format(
+            ' '.join(f"WHEN '{tag}' THEN {code}" for code, tag in TAGS.items())
+        )
+    )
+    postgresql.ENUM(name='tag_enum').drop(op.get_bind(), checkfirst=True)
+
+
+def downgrade():
+    tag_enum = postgresql.ENUM(*TAGS.values(), name='tag_enum')
+    tag_enum.create(op.get_bind(), checkfirst=True)
+    op.alter_column(
+        'articles',
+        'tag',
+        existing_type=sa.SmallInteger(),
+        type_=tag_enum,
+        existing_nullable=False,
+        postgresql_using='(CASE tag {} END)::tag_enum'.format(
+            ' '.join(f"WHEN {code} THEN '{tag}'" for code, tag in TAGS.items())
+        )
+    )
@@ -0,0 +1,24 @@
+"""index articles.user_id
+
+Revision ID: 9a6d93a90b30
+Revises: 079fe58acc72
+Create Date: 2026-10-15 12:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a6d93a90b30'
+down_revision = '079fe58acc72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_articles_user_id', 'articles', ['user_id'])
+
+
+def downgrade():
+    op.drop_index('ix_articles_user_id', table_name='articles')
@@ -1,21 +1,59 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import MetaData
-from sqlalchemy_serializer import SerializerMixin
 from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import selectinload
 from flask_bcrypt import Bcrypt
-from sqlalchemy import Enum
+from sqlalchemy import SmallInteger
+from sqlalchemy.types import TypeDecorator
 
 metadata = MetaData(naming_convention={
+    "ix": "ix_%(column_0_label)s",
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"
 })
 
 db = SQLAlchemy(metadata=metadata)
 bcrypt = Bcrypt()
 
-class Article(db.Model, SerializerMixin):
-    __tablename__ = 'articles'
+# Matches the format the API returned when models used SerializerMixin
+DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# bcrypt releases the GIL while hashing, so password checks scale with cores
+executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+def check_password(password_hash, password, timeout=2):
+    future = executor.submit(bcrypt.check_password_hash, password_hash, password)
+    try:
+        return future.result(timeout=timeout)
+    except TimeoutError:
+        # Drop the job if it is still queued so a backlog doesn't keep growing
+        future.cancel()
+        raise
+
+class TagType(TypeDecorator):
+    """Stores an article tag as a SMALLINT code instead of a string enum."""
+
+    impl = SmallInteger
+    cache_ok = True
+
+    TAGS = {1: 'Product', 2: 'Engineering', 3: 'Design'}
+    CODES = {tag: code for code, tag in TAGS.items()}
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self.CODES[value]
+        except KeyError:
+            raise ValueError(f'Invalid tag: {value}')
 
-    serialize_rules = ('-user.articles',)
+    def process_result_value(self, value, dialect):
+        return None if value is None else self.TAGS[value]
+
+class Article(db.Model):
+    __tablename__ = 'articles'
 
     DEFAULT_PREVIEW_IMAGE = "https://res.cloudinary.com/df3n8xhsq/image/upload/v1744458196/341-800x450_zeafvw.jpg"
 
@@ -27,19 +65,41 @@ class Article(db.Model, SerializerMixin):
     preview_text = db.Column(db.String)
     preview_image = db.Column(db.String, default=DEFAULT_PREVIEW_IMAGE)
     minutes_to_read = db.Column(db.Integer)
-    tag = db.Column(Enum('Product', 'Engineering', 'Design', name='tag_enum'), default='Engineering', nullable=False)
+    tag = db.Column(TagType, default='Engineering', nullable=False)
     date = db.Column(db.DateTime, server_default=db.func.now())
 
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), index=True)
+
+    user = db.relationship('User', back_populates='articles')
 
     def __repr__(self):
         return f'Article {self.id} by {self.author}'
 
-class User(db.Model, SerializerMixin):
+    @classmethod
+    def query_with_user(cls):
+        return cls.query.options(selectinload(cls.user))
+
+    def _serialize(self, include_user=True):
+        # app.INDEX_ARTICLES_SQL builds the same payload in SQL for the index
+        data = {
+            'id': self.id,
+            'author': self.author,
+            'title': self.title,
+            'content': self.content,
+            'preview_text': self.preview_text,
+            'preview_image': self.preview_image,
+            'minutes_to_read': self.minutes_to_read,
+            'tag': self.tag,
+            'date': self.date.strftime(DATETIME_FORMAT) if self.date else None,
+            'user_id': self.user_id
+        }
+        if include_user:
+            data['user'] = self.user._serialize() if self.user else None
+        return data
+
+class User(db.Model):
     __tablename__ = 'users'
 
-    serialize_rules = ('-articles.user',)
-
     DEFAULT_AVATAR = "https://res.cloudinary.com/df3n8xhsq/image/upload/w_1000,c_fill,ar_1:1,g_auto,r_max,bo_5px_solid_red,b_rgb:262c35/v1744403231/bear_hh1n40.png"
 
     id = db.Column(db.Integer, primary_key=True)
@@ -47,7 +107,18 @@ class User(db.Model, SerializerMixin):
     _password_hash = db.Column(db.String)
     avatar = db.Column(db.String, default=DEFAULT_AVATAR)
 
-    articles = db.relationship('Article', backref='user')
+    articles = db.relationship('Article', back_populates='user')
+
+    def _serialize(self, include_articles=False):
+        # Also embedded in SQL by app.INDEX_ARTICLES_SQL; keep the two in step
+        data = {
+            'id': self.id,
+            'username': self.username,
+            'avatar': self.avatar
+        }
+        if include_articles:
+            data['articles'] = [article._serialize(include_user=False) for article in self.articles]
+        return data
 
     @hybrid_property
     def password_hash(self):
@@ -59,4 +130,10 @@ class User(db.Model, SerializerMixin):
         self._password_hash = password_hash.decode('utf-8')
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password)
\ No newline at end of file
+        return check_password(self._password_hash, password)
+
+    def needs_rehash(self):
+        # bcrypt hashes look like $2b$<cost>$<salt+hash>. Only upgrade: a lower
+        # setting must never weaken hashes that are already stored.
+        cost = int(self._password_hash.split('$')[2])
+        return cost < current_app.config['BCRYPT_LOG_ROUNDS']
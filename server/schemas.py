@@ -0,0 +1,12 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+
+class ArticleIn(BaseModel):
+    title: str
+    content: str
+    preview_text: str
+    minutes_to_read: int
+    tag: Literal['Product', 'Engineering', 'Design'] = 'Engineering'
+    preview_image: Optional[str] = None
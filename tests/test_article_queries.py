@@ -0,0 +1,46 @@
+import pytest
+from flask import Flask
+from sqlalchemy.orm import raiseload
+
+from models import db, Article, User
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        users = [User(username=f'user{i}') for i in range(3)]
+        db.session.add_all(users)
+        db.session.flush()
+        db.session.add_all(
+            Article(author=user.username, title=f'Article {i}', user_id=user.id)
+            for user in users
+            for i in range(2)
+        )
+        db.session.commit()
+        db.session.expunge_all()
+
+        yield app
+
+        db.drop_all()
+
+
+def test_articles_with_user_serialize_without_lazy_loads(app):
+    articles = Article.query_with_user().options(raiseload('*')).all()
+
+    serialized = [article._serialize() for article in articles]
+
+    assert len(serialized) == 6
+    assert all(data['user']['id'] == data['user_id'] for data in serialized)
+
+
+def test_user_articles_serialize_without_lazy_loads(app):
+    user = User.query.filter_by(username='user0').first()
+    articles = Article.query_with_user().options(raiseload('*')).filter_by(user_id=user.id).all()
+
+    assert [article._serialize()['user']['username'] for article in articles] == ['user0', 'user0']
+
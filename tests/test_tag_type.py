@@ -0,0 +1,40 @@
+import pytest
+from flask import Flask
+from sqlalchemy import text
+
+from models import db, Article, TagType
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    db.init_app(app)
+
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.drop_all()
+
+
+@pytest.mark.parametrize('code, tag', TagType.TAGS.items())
+def test_tag_round_trips_through_its_code(app, code, tag):
+    db.session.add(Article(title='Tagged', tag=tag))
+    db.session.commit()
+    db.session.expunge_all()
+
+    assert db.session.execute(text('SELECT tag FROM articles')).scalar() == code
+    assert Article.query.one().tag == tag
+
+
+def test_tag_defaults_to_engineering(app):
+    db.session.add(Article(title='Untagged'))
+    db.session.commit()
+    db.session.expunge_all()
+
+    assert Article.query.one().tag == 'Engineering'
+
+
+def test_unknown_tag_is_rejected():
+    with pytest.raises(ValueError):
+        TagType().process_bind_param('Marketing', None)